@@ -12,6 +12,14 @@ from functools import lru_cache
 import logging
 import signal
 import time
+import threading
+import uuid
+from collections import OrderedDict
+
+try:
+    import orjson
+except ImportError:  # Fall back to the standard library encoder
+    orjson = None
 
 # Setup logging
 logging.basicConfig(level=logging.INFO,
@@ -19,9 +27,17 @@ logging.basicConfig(level=logging.INFO,
 logger = logging.getLogger(__name__)
 
 # Create Flask app
-from flask import Flask, request, jsonify
+from flask import Flask, request
 app = Flask(__name__)
 
+def json_response(payload, status=200, headers=None):
+    """Serialize a payload with orjson when available, otherwise with the json module."""
+    if orjson is not None:
+        body = orjson.dumps(payload)
+    else:
+        body = json.dumps(payload, separators=(',', ':'))
+    return app.response_class(body, status=status, headers=headers, mimetype='application/json')
+
 def extract_first_paragraph(text):
     """
     Extract the first paragraph from HTML content or return the plain text.
@@ -98,6 +114,19 @@ INDEX_FILE_PATH = os.environ.get("INDEX_FILE_PATH", "news_search.index")
 ARTICLE_IDS_FILE_PATH = os.environ.get("ARTICLE_IDS_FILE_PATH", "article_ids.json")
 CACHE_EXPIRY = int(os.environ.get("CACHE_EXPIRY", "86400"))  # 24 hours in seconds
 MODEL_NAME = os.environ.get("MODEL_NAME", "sentence-transformers/all-MiniLM-L6-v2")
+DEFAULT_TOP_K = int(os.environ.get("DEFAULT_TOP_K", "30"))
+MAX_TOP_K = int(os.environ.get("MAX_TOP_K", "100"))
+SEARCH_CURSOR_TTL = int(os.environ.get("SEARCH_CURSOR_TTL", "600"))  # 10 minutes in seconds
+SEARCH_CURSOR_CACHE_SIZE = int(os.environ.get("SEARCH_CURSOR_CACHE_SIZE", "256"))
+
+# Response fields a client may request, mapped to the MongoDB fields needed to build them
+SEARCH_FIELD_PROJECTIONS = {
+    "title": ("title",),
+    "description": ("processed_description",),
+    "full_description": ("description",),
+    "link": ("link",),
+}
+DEFAULT_SEARCH_FIELDS = tuple(SEARCH_FIELD_PROJECTIONS)
 
 if not MONGODB_URI:
     logger.error("MONGODB_URI not set")
@@ -112,6 +141,10 @@ global_faiss_index = None
 global_article_ids = None
 last_index_update = 0
 
+# Ranked candidate lists of recent searches, keyed by search id, for cursor pagination
+search_candidate_cache = OrderedDict()
+search_candidate_cache_lock = threading.Lock()
+
 def initialize_mongodb():
     """Initialize MongoDB connection with connection pooling."""
     global global_mongo_client, global_db, global_collection
@@ -376,12 +409,12 @@ def load_data_and_build_index(force_rebuild=False):
     finally:
         print("load_data_and_build_index: Ending", file=sys.stderr)  # Added print statement
 
-def search_articles_with_faiss(search_query, faiss_index, article_ids, top_k=30):
-    """Performs a similarity search using the Faiss index."""
-    global global_model, global_collection
+def search_articles_with_faiss(search_query, faiss_index, article_ids, top_k=DEFAULT_TOP_K):
+    """Performs a similarity search using the Faiss index and returns the matching article IDs in rank order."""
+    global global_model
 
     try:
-        print(f"search_articles_with_faiss: Starting with query: {search_query}", file=sys.stderr)  # Added print statement
+        print(f"search_articles_with_faiss: Starting with query: {search_query}, top_k: {top_k}", file=sys.stderr)  # Added print statement
         if global_model is None:
             logger.error("Model not initialized")
             print("search_articles_with_faiss: Model not initialized", file=sys.stderr)  # Added print statement
@@ -405,50 +438,149 @@ def search_articles_with_faiss(search_query, faiss_index, article_ids, top_k=30)
 
         D, I = faiss_index.search(search_vector, top_k)
 
-        results = []
-        batch_indices = [int(i) for i in I[0] if i >= 0 and i < len(article_ids)]
+        batch_ids = [article_ids[int(i)] for i in I[0] if i >= 0 and i < len(article_ids)]
 
-        if not batch_indices:
+        if not batch_ids:
             print("search_articles_with_faiss: No results found in FAISS index", file=sys.stderr)  # Added print statement
             return []
 
-        # Performance optimization: Batch database queries
-        batch_ids = [article_ids[i] for i in batch_indices]
+        print(f"search_articles_with_faiss: Found {len(batch_ids)} candidates", file=sys.stderr)  # Added print statement
+        return batch_ids
 
-        # Make sure MongoDB is initialized
-        if global_collection is None:
-            print("search_articles_with_faiss: Initializing MongoDB", file=sys.stderr)  # Added print statement
-            initialize_mongodb()
+    except Exception as e:
+        logger.error(f"Search error: {str(e)}")
+        print(f"search_articles_with_faiss: Search error: {str(e)}", file=sys.stderr)  # Added print statement
+        return []
+    finally:
+        print("search_articles_with_faiss: Ending", file=sys.stderr)  # Added print statement
 
-        articles = list(global_collection.find(
-            {"_id": {"$in": batch_ids}},
-            {"_id": 1, "title": 1, "link": 1, "description": 1, "processed_description": 1}
-        ))
+def fetch_articles_by_ids(batch_ids, fields=DEFAULT_SEARCH_FIELDS):
+    """Fetches articles in the given order, projecting only the MongoDB fields needed for the requested response fields."""
+    global global_collection
 
-        # Create a mapping for faster lookup
-        articles_map = {str(article.get("_id")): article for article in articles}
+    if not batch_ids:
+        return []
 
-        results = []
-        for idx in batch_indices:
-            article_id = article_ids[idx]
-            if str(article_id) in articles_map:
-                article = articles_map[str(article_id)]
+    # Make sure MongoDB is initialized
+    if global_collection is None:
+        print("fetch_articles_by_ids: Initializing MongoDB", file=sys.stderr)  # Added print statement
+        initialize_mongodb()
 
-                # Process description if not already processed
-                if 'processed_description' not in article or not article['processed_description']:
-                    article['processed_description'] = extract_first_paragraph(article.get('description', ''))
+    projection = {"_id": 1}
+    for field in fields:
+        for db_field in SEARCH_FIELD_PROJECTIONS[field]:
+            projection[db_field] = 1
 
-                results.append(article)
+    # Performance optimization: Batch database queries
+    articles = global_collection.find({"_id": {"$in": batch_ids}}, projection)
 
-        print(f"search_articles_with_faiss: Found {len(results)} results", file=sys.stderr)  # Added print statement
-        return results
+    # Create a mapping for faster lookup
+    articles_map = {str(article.get("_id")): article for article in articles}
 
-    except Exception as e:
-        logger.error(f"Search error: {str(e)}")
-        print(f"search_articles_with_faiss: Search error: {str(e)}", file=sys.stderr)  # Added print statement
+    # Only fetch the raw description for articles that have no processed description stored
+    if "description" in fields:
+        missing_ids = [article["_id"] for article in articles_map.values()
+                       if not article.get("processed_description") and "description" not in article]
+        if missing_ids:
+            print(f"fetch_articles_by_ids: Fetching raw description for {len(missing_ids)} articles", file=sys.stderr)  # Added print statement
+            for article in global_collection.find({"_id": {"$in": missing_ids}}, {"_id": 1, "description": 1}):
+                articles_map[str(article["_id"])]["description"] = article.get("description", "")
+
+    return [articles_map[str(article_id)] for article_id in batch_ids if str(article_id) in articles_map]
+
+def filter_existing_ids(batch_ids):
+    """Drops IDs that no longer have a document in MongoDB, keeping the given order."""
+    global global_collection
+
+    if not batch_ids:
         return []
-    finally:
-        print("search_articles_with_faiss: Ending", file=sys.stderr)  # Added print statement
+
+    # Make sure MongoDB is initialized
+    if global_collection is None:
+        print("filter_existing_ids: Initializing MongoDB", file=sys.stderr)  # Added print statement
+        initialize_mongodb()
+
+    existing_ids = {str(article["_id"]) for article in global_collection.find({"_id": {"$in": batch_ids}}, {"_id": 1})}
+    return [article_id for article_id in batch_ids if str(article_id) in existing_ids]
+
+def format_article(article, fields):
+    """Builds the response entry for an article containing only the requested fields."""
+    formatted = {}
+    for field in fields:
+        if field == "description":
+            # Use processed_description if available, otherwise extract it now
+            description = article.get('processed_description', None)
+            if not description:
+                description = extract_first_paragraph(article.get('description', 'N/A'))
+            formatted["description"] = description
+        elif field == "full_description":
+            formatted["full_description"] = article.get('description', 'N/A')
+        else:
+            formatted[field] = article.get(field, 'N/A')
+    return formatted
+
+def cache_search_candidates(candidate_ids, page_size, fields):
+    """Stores a ranked candidate list and its page settings for later pages and returns its search id."""
+    search_id = uuid.uuid4().hex
+    with search_candidate_cache_lock:
+        search_candidate_cache[search_id] = {
+            "ids": candidate_ids,
+            "page_size": page_size,
+            "fields": fields,
+            "index_version": last_index_update,
+            "created_at": time.time(),
+        }
+        while len(search_candidate_cache) > SEARCH_CURSOR_CACHE_SIZE:
+            search_candidate_cache.popitem(last=False)
+    return search_id
+
+def get_cached_search(search_id):
+    """Returns a cached search entry, or None if it has expired or the index was rebuilt since."""
+    with search_candidate_cache_lock:
+        entry = search_candidate_cache.get(search_id)
+        if entry is None:
+            return None
+        if time.time() - entry["created_at"] > SEARCH_CURSOR_TTL or entry["index_version"] != last_index_update:
+            del search_candidate_cache[search_id]
+            return None
+        search_candidate_cache.move_to_end(search_id)
+        return entry
+
+def parse_cursor(cursor):
+    """Splits a pagination cursor into its search id and offset, or returns (None, None) if malformed."""
+    search_id, _, offset = str(cursor).partition(':')
+    if not search_id or not (offset.isascii() and offset.isdigit()):
+        return None, None
+    return search_id, int(offset)
+
+def parse_positive_int(value, default, maximum):
+    """Parses a positive integer request parameter, clamping it to the given maximum."""
+    if value is None:
+        return default
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return None
+    if value < 1:
+        return None
+    return min(value, maximum)
+
+def parse_fields(value, default=DEFAULT_SEARCH_FIELDS):
+    """Parses the requested response fields, returning None if any field is unknown."""
+    if value is None:
+        return default
+    if isinstance(value, str):
+        value = value.split(',')
+    if not isinstance(value, list):
+        return None
+    fields = []
+    for field in value:
+        field = str(field).strip()
+        if field not in SEARCH_FIELD_PROJECTIONS:
+            return None
+        if field not in fields:
+            fields.append(field)
+    return tuple(fields) or None
 
 
 def detect_and_process_pincode(search_term):
@@ -516,72 +648,133 @@ def check_and_update_index():
 # API endpoints
 @app.route('/search', methods=['POST'])
 def search():
+    """
+    Search articles. Accepts `query`, optional `top_k`, `page_size` and `fields`,
+    or a `cursor` from the previous page's X-Next-Cursor header to continue a search.
+    A continued search keeps the original `page_size` and `fields` unless overridden.
+    """
     print("search: Starting", file=sys.stderr)  # Added print statement
     start_time = time.time()
+    global global_faiss_index, global_article_ids
 
-    # Get search query from request
-    data = request.json
+    # Get search parameters from request
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        print("search: Request body is not a JSON object", file=sys.stderr)  # Added print statement
+        return json_response({"error": "Request body must be a JSON object"}, 400)
     search_term = data.get('query')
+    cursor = data.get('cursor')
 
-    if not search_term:
+    if not search_term and not cursor:
         print("search: No search query provided", file=sys.stderr)  # Added print statement
-        return jsonify({"error": "No search query provided"}), 400
+        return json_response({"error": "No search query provided"}, 400)
+
+    search_id = None
+    page_articles = None
+
+    if cursor:
+        # Serve later pages from the cached candidate list instead of searching again
+        search_id, offset = parse_cursor(cursor)
+        cached_search = get_cached_search(search_id) if search_id else None
+        if cached_search is None:
+            print("search: Invalid or expired cursor", file=sys.stderr)  # Added print statement
+            return json_response({"error": "Invalid or expired cursor"}, 400)
+        candidate_ids = cached_search["ids"]
+        default_page_size = cached_search["page_size"]
+        default_fields = cached_search["fields"]
+        print(f"search: Serving cached search {search_id} from offset {offset}", file=sys.stderr)  # Added print statement
+    else:
+        top_k = parse_positive_int(data.get('top_k'), DEFAULT_TOP_K, MAX_TOP_K)
+        if top_k is None:
+            return json_response({"error": "top_k must be a positive integer"}, 400)
+        offset = 0
+        default_page_size = top_k
+        default_fields = DEFAULT_SEARCH_FIELDS
 
-    # Initialize resources if needed
-    global global_faiss_index, global_article_ids
+    page_size = parse_positive_int(data.get('page_size'), default_page_size, MAX_TOP_K)
+    if page_size is None:
+        return json_response({"error": "page_size must be a positive integer"}, 400)
 
-    if global_faiss_index is None or global_article_ids is None:
-        print("search: First-time initialization of index and resources", file=sys.stderr)  # Added print statement
-        global_faiss_index, global_article_ids = load_data_and_build_index()
+    fields = parse_fields(data.get('fields'), default_fields)
+    if fields is None:
+        return json_response({"error": f"fields must be a subset of: {', '.join(SEARCH_FIELD_PROJECTIONS)}"}, 400)
 
-        if global_faiss_index is None or global_article_ids is None:
-            print("search: Failed to initialize search index", file=sys.stderr)  # Added print statement
-            return jsonify({"error": "Failed to initialize search index"}), 500
-
-    # Check if index needs updating
-    check_and_update_index()
-
-    # Get location terms
-    location_terms = detect_and_process_pincode(search_term)
-
-    # Perform search
-    logger.info(f"Searching for: {search_term}")
-    print(f"search: Searching for: {search_term}", file=sys.stderr)  # Added print statement
-    results = search_articles_with_faiss(
-        search_term,
-        global_faiss_index,
-        global_article_ids
-    )
-
-    # Format the results
-    formatted_results = []
-    if results:
-        ranked_results = rank_results(results, location_terms)
-        for article in ranked_results:
-            # Use processed_description if available, otherwise extract it now
-            description = article.get('processed_description', None)
-            if not description:
-                description = extract_first_paragraph(article.get('description', 'N/A'))
+    try:
+        if not cursor:
+            # Initialize resources if needed
+            if global_faiss_index is None or global_article_ids is None:
+                print("search: First-time initialization of index and resources", file=sys.stderr)  # Added print statement
+                global_faiss_index, global_article_ids = load_data_and_build_index()
+
+                if global_faiss_index is None or global_article_ids is None:
+                    print("search: Failed to initialize search index", file=sys.stderr)  # Added print statement
+                    return json_response({"error": "Failed to initialize search index"}, 500)
+
+            # Check if index needs updating
+            check_and_update_index()
+
+            # Get location terms
+            location_terms = detect_and_process_pincode(search_term)
+
+            # Perform search
+            logger.info(f"Searching for: {search_term}")
+            print(f"search: Searching for: {search_term}", file=sys.stderr)  # Added print statement
+            candidate_ids = search_articles_with_faiss(
+                search_term,
+                global_faiss_index,
+                global_article_ids,
+                top_k=top_k
+            )
+
+            if candidate_ids and location_terms:
+                # Ranking needs the title, raw description and link of every candidate,
+                # so fetch everything once and build the first page from the same documents
+                candidates = rank_results(
+                    fetch_articles_by_ids(candidate_ids, ("title", "description", "full_description", "link")),
+                    location_terms
+                )
+                candidate_ids = [article["_id"] for article in candidates]
+                page_articles = candidates[:page_size]
+            elif len(candidate_ids) > page_size:
+                # Only candidates that get cached for later pages need checking against MongoDB,
+                # so the total and cursors skip IDs whose documents were removed
+                candidate_ids = filter_existing_ids(candidate_ids)
+
+        # Fetch only the current page
+        if page_articles is None:
+            page_articles = fetch_articles_by_ids(candidate_ids[offset:offset + page_size], fields)
+    except Exception as e:
+        logger.error(f"Error fetching search results: {str(e)}")
+        print(f"search: Error fetching search results: {str(e)}", file=sys.stderr)  # Added print statement
+        return json_response({"error": f"Failed to fetch search results: {str(e)}"}, 500)
+
+    formatted_results = [format_article(article, fields) for article in page_articles]
+
+    # On the last page the fetched articles give the exact total without checking every candidate
+    if offset + page_size >= len(candidate_ids):
+        total_count = offset + len(page_articles)
+    else:
+        total_count = len(candidate_ids)
 
-            formatted_results.append({
-                "title": article.get('title', 'N/A'),
-                "description": description,  # Use the processed description
-                "full_description": article.get('description', 'N/A'),  # Include full description if needed
-                "link": article.get('link', 'N/A')
-            })
+    headers = {"X-Total-Count": str(total_count)}
+    if offset + page_size < len(candidate_ids):
+        # Only searches with a further page need their candidates cached
+        if search_id is None:
+            search_id = cache_search_candidates(candidate_ids, page_size, fields)
+        headers["X-Next-Cursor"] = f"{search_id}:{offset + page_size}"
 
     search_time = time.time() - start_time
-    logger.info(f"Search completed in {search_time:.2f} seconds, found {len(formatted_results)} results")
-    print(f"search: Search completed in {search_time:.2f} seconds, found {len(formatted_results)} results", file=sys.stderr)  # Added print statement
+    logger.info(f"Search completed in {search_time:.2f} seconds, returned {len(formatted_results)} of {total_count} results")
+    print(f"search: Search completed in {search_time:.2f} seconds, returned {len(formatted_results)} of {total_count} results", file=sys.stderr)  # Added print statement
 
     print("search: Ending", file=sys.stderr)  # Added print statement
-    return jsonify(formatted_results)
+    return json_response(formatted_results, headers=headers)
 
 @app.route('/healthcheck', methods=['GET'])
 def healthcheck():
     """Simple endpoint to check if the service is running."""
     print("healthcheck: Called", file=sys.stderr)  # Added print statement
-    return jsonify({"status": "ok", "service": "news-search-service"})
+    return json_response({"status": "ok", "service": "news-search-service"})
 
 @app.route('/rebuild-index', methods=['POST'])
 def rebuild_index():
@@ -596,14 +789,14 @@ def rebuild_index():
 
         if global_faiss_index is None or global_article_ids is None:
             print("rebuild_index: Failed to rebuild index", file=sys.stderr)  # Added print statement
-            return jsonify({"error": "Failed to rebuild index"}), 500
+            return json_response({"error": "Failed to rebuild index"}, 500)
 
         print(f"rebuild_index: Index rebuilt with {len(global_article_ids)} articles", file=sys.stderr)  # Added print statement
-        return jsonify({"status": "success", "message": f"Index rebuilt with {len(global_article_ids)} articles"})
+        return json_response({"status": "success", "message": f"Index rebuilt with {len(global_article_ids)} articles"})
     except Exception as e:
         logger.error(f"Error rebuilding index: {str(e)}")
         print(f"rebuild_index: Error rebuilding index: {str(e)}", file=sys.stderr)  # Added print statement
-        return jsonify({"error": f"Failed to rebuild index: {str(e)}"}), 500
+        return json_response({"error": f"Failed to rebuild index: {str(e)}"}, 500)
 
 # Initialize resources at startup
 def initialize_resources():
@@ -0,0 +1,207 @@
+import os
+import sys
+
+import pytest
+
+for module in ("flask", "pymongo", "numpy", "faiss", "sentence_transformers", "torch", "requests"):
+    pytest.importorskip(module)
+
+os.environ.setdefault("MONGODB_URI", "mongodb://localhost:27017")
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import script2  # noqa: E402
+
+
+class FakeCollection:
+    """Minimal stand-in for a pymongo collection supporting `$in` lookups with projections."""
+
+    def __init__(self, documents, error=None):
+        self.documents = documents
+        self.error = error
+        self.queries = []
+
+    def find(self, query, projection):
+        if self.error:
+            raise self.error
+        self.queries.append((query, projection))
+        ids = query["_id"]["$in"]
+        return [
+            {key: value for key, value in doc.items() if key in projection}
+            for doc in self.documents if doc["_id"] in ids
+        ]
+
+
+def make_articles(count):
+    return [
+        {
+            "_id": f"id{i}",
+            "title": f"Title {i}",
+            "link": f"https://example.com/{i}",
+            "description": f"<p>Summary {i}</p><p>Body {i}</p>",
+            "processed_description": f"Summary {i}",
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture(autouse=True)
+def reset_cache(monkeypatch):
+    monkeypatch.setattr(script2, "search_candidate_cache", script2.OrderedDict())
+    monkeypatch.setattr(script2, "last_index_update", 1.0)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    collection = FakeCollection(make_articles(5))
+    monkeypatch.setattr(script2, "global_collection", collection)
+    monkeypatch.setattr(script2, "global_faiss_index", object())
+    monkeypatch.setattr(script2, "global_article_ids", [])
+    monkeypatch.setattr(script2, "check_and_update_index", lambda: None)
+    monkeypatch.setattr(script2, "detect_and_process_pincode", lambda term: [])
+    # "stale" has no document in the collection
+    monkeypatch.setattr(script2, "search_articles_with_faiss",
+                        lambda *args, **kwargs: ["id0", "stale", "id1", "id2", "id3", "id4"])
+    client = script2.app.test_client()
+    client.collection = collection
+    return client
+
+
+def test_parse_cursor():
+    assert script2.parse_cursor("abc:10") == ("abc", 10)
+    assert script2.parse_cursor("abc") == (None, None)
+    assert script2.parse_cursor(":10") == (None, None)
+    assert script2.parse_cursor("abc:-1") == (None, None)
+    assert script2.parse_cursor("abc:²") == (None, None)
+    assert script2.parse_cursor("abc:٣") == (None, None)
+
+
+def test_parse_positive_int():
+    assert script2.parse_positive_int(None, 30, 100) == 30
+    assert script2.parse_positive_int("5", 30, 100) == 5
+    assert script2.parse_positive_int(500, 30, 100) == 100
+    assert script2.parse_positive_int(0, 30, 100) is None
+    assert script2.parse_positive_int("abc", 30, 100) is None
+
+
+def test_parse_fields():
+    assert script2.parse_fields(None) == script2.DEFAULT_SEARCH_FIELDS
+    assert script2.parse_fields(None, ("title",)) == ("title",)
+    assert script2.parse_fields("title, link,title") == ("title", "link")
+    assert script2.parse_fields(["description"]) == ("description",)
+    assert script2.parse_fields(["title", "vector"]) is None
+    assert script2.parse_fields([]) is None
+    assert script2.parse_fields(5) is None
+
+
+def test_cached_search_expires_after_ttl(monkeypatch):
+    search_id = script2.cache_search_candidates(["id0"], 10, ("title",))
+    assert script2.get_cached_search(search_id)["ids"] == ["id0"]
+
+    monkeypatch.setattr(script2, "SEARCH_CURSOR_TTL", -1)
+    assert script2.get_cached_search(search_id) is None
+    assert search_id not in script2.search_candidate_cache
+
+
+def test_cached_search_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(script2, "SEARCH_CURSOR_CACHE_SIZE", 2)
+    first = script2.cache_search_candidates(["id0"], 10, ("title",))
+    second = script2.cache_search_candidates(["id1"], 10, ("title",))
+    script2.get_cached_search(first)
+    third = script2.cache_search_candidates(["id2"], 10, ("title",))
+
+    assert script2.get_cached_search(second) is None
+    assert script2.get_cached_search(first) is not None
+    assert script2.get_cached_search(third) is not None
+
+
+def test_cached_search_invalidated_by_index_rebuild(monkeypatch):
+    search_id = script2.cache_search_candidates(["id0"], 10, ("title",))
+    monkeypatch.setattr(script2, "last_index_update", 2.0)
+    assert script2.get_cached_search(search_id) is None
+
+
+def test_fetch_articles_projects_processed_description_only(monkeypatch):
+    articles = make_articles(3)
+    del articles[1]["processed_description"]
+    collection = FakeCollection(articles)
+    monkeypatch.setattr(script2, "global_collection", collection)
+
+    results = script2.fetch_articles_by_ids(["id2", "missing", "id1", "id0"], ("title", "description"))
+
+    assert [article["_id"] for article in results] == ["id2", "id1", "id0"]
+    assert "description" not in collection.queries[0][1]
+    # The raw description is only fetched for the article without a processed one
+    assert collection.queries[1] == ({"_id": {"$in": ["id1"]}}, {"_id": 1, "description": 1})
+    assert [script2.format_article(article, ("description",)) for article in results] == [
+        {"description": "Summary 2"},
+        {"description": "Summary 1"},
+        {"description": "Summary 0"},
+    ]
+
+
+def test_filter_existing_ids(monkeypatch):
+    collection = FakeCollection(make_articles(2))
+    monkeypatch.setattr(script2, "global_collection", collection)
+
+    assert script2.filter_existing_ids(["id1", "stale", "id0"]) == ["id1", "id0"]
+    assert collection.queries[0][1] == {"_id": 1}
+
+
+def test_search_paginates_with_original_page_size_and_fields(client):
+    response = client.post("/search", json={"query": "news", "page_size": 2, "fields": ["title", "link"]})
+    assert response.status_code == 200
+    assert response.headers["X-Total-Count"] == "5"
+    assert response.get_json() == [
+        {"title": "Title 0", "link": "https://example.com/0"},
+        {"title": "Title 1", "link": "https://example.com/1"},
+    ]
+
+    response = client.post("/search", json={"cursor": response.headers["X-Next-Cursor"]})
+    assert response.status_code == 200
+    assert response.get_json() == [
+        {"title": "Title 2", "link": "https://example.com/2"},
+        {"title": "Title 3", "link": "https://example.com/3"},
+    ]
+
+    response = client.post("/search", json={"cursor": response.headers["X-Next-Cursor"]})
+    assert response.get_json() == [{"title": "Title 4", "link": "https://example.com/4"}]
+    assert "X-Next-Cursor" not in response.headers
+
+
+def test_single_page_search_issues_one_find(client):
+    response = client.post("/search", json={"query": "news", "fields": ["title"]})
+    assert response.status_code == 200
+    assert response.headers["X-Total-Count"] == "5"
+    assert "X-Next-Cursor" not in response.headers
+    assert len(response.get_json()) == 5
+    assert len(client.collection.queries) == 1
+
+
+def test_search_rejects_non_object_body(client):
+    response = client.post("/search", json=[1, 2])
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Request body must be a JSON object"}
+
+
+def test_search_rejects_invalid_cursor(client):
+    response = client.post("/search", json={"cursor": "unknown:2"})
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Invalid or expired cursor"}
+
+
+def test_search_reports_database_errors_as_json(client, monkeypatch):
+    monkeypatch.setattr(script2, "global_collection", FakeCollection([], error=RuntimeError("connection lost")))
+
+    response = client.post("/search", json={"query": "news"})
+    assert response.status_code == 500
+    assert "connection lost" in response.get_json()["error"]
+
+
+def test_search_builds_first_ranked_page_from_one_fetch(client, monkeypatch):
+    monkeypatch.setattr(script2, "detect_and_process_pincode", lambda term: ["Title 3"])
+
+    response = client.post("/search", json={"query": "news 560001", "page_size": 2, "fields": ["title"]})
+    assert response.status_code == 200
+    assert response.headers["X-Total-Count"] == "5"
+    assert response.get_json() == [{"title": "Title 3"}, {"title": "Title 0"}]
+    assert len(client.collection.queries) == 1
@@ -34,26 +34,28 @@ export const getTopicsOfInterest = async (req, res) => {
 
 export const getNewsArticles = async (req, res) => {
     try {
-        const searchQuery = req.body.query;
+        const { query: searchQuery, top_k, page_size, cursor, fields } = req.body;
 
-        if (!searchQuery) {
+        if (!searchQuery && !cursor) {
             return res.status(400).json({ success: false, message: "Search query is required" });
         }
 
-        console.log("Sending Search Query to Python Service:", searchQuery);
+        console.log("Sending Search Query to Python Service:", searchQuery || `cursor ${cursor}`);
 
         try {
             const response = await axios.post(`${PYTHON_SERVICE_URL}/search`, {
-                query: searchQuery
+                query: searchQuery, top_k, page_size, cursor, fields
             }, {
                 timeout: 30000 // 30 second timeout
             });
 
-            console.log("Received Python Results:", response.data);
+            console.log(`Received ${response.data.length} Python Results`);
 
             res.status(200).json({
                 success: true,
                 data: response.data,
+                total: Number(response.headers['x-total-count']),
+                next_cursor: response.headers['x-next-cursor'] || null,
                 message: "News articles fetched successfully"
             });
 
@@ -64,23 +64,31 @@ app.use("/api", newsRoutes);
 // Modified newsRoutes to incorporate caching
 app.post('/api/news/search', async (req, res) => {
   try {
-    const { query } = req.body;
+    const { query, top_k, page_size, cursor, fields } = req.body;
 
-    if (!query) {
+    if (!query && !cursor) {
       return res.status(400).json({ error: 'Query is required' });
     }
 
-    console.log(`Searching for news: ${query}`);
+    console.log(`Searching for news: ${query || `cursor ${cursor}`}`);
 
     // Call Python service
     try {
       const response = await axios.post(`${PYTHON_SERVICE_URL}/search`, {
-        query: query
+        query, top_k, page_size, cursor, fields
       }, {
         timeout: 30000 // 30 second timeout
       });
 
-      res.json(response.data); // Forward the data from Python service
+      // Forward the pagination headers and data from Python service
+      res.set('Access-Control-Expose-Headers', 'X-Next-Cursor, X-Total-Count');
+      for (const header of ['X-Total-Count', 'X-Next-Cursor']) {
+        const value = response.headers[header.toLowerCase()];
+        if (value) {
+          res.set(header, value);
+        }
+      }
+      res.json(response.data);
     } catch (pythonError) {
       console.error('Error calling Python service:', pythonError.message);
 